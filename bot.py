@@ -1,11 +1,20 @@
 #!/usr/bin/env python
 import os
 import re
+import copy
+import json
+import asyncio
 import logging
-import requests
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Optional
+import aiohttp
+from cachetools import TTLCache
 from bs4 import BeautifulSoup
-from telegram import Update, ParseMode
-from telegram.ext import Updater, CommandHandler, MessageHandler, Filters, CallbackContext
+from telegram import Update, InputMediaPhoto
+from telegram.constants import ParseMode
+from telegram.error import BadRequest, RetryAfter
+from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
 
 # Enable logging
 logging.basicConfig(
@@ -13,6 +22,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+NAMSHI_URL_RE = re.compile(r'https?://(?:www\.)?namshi\.com/.*?/p/')
+_WIDTH_RE = re.compile(r'([?&]width=)(\d+)')
+# Product info keyed on the cleaned URL, so popular products are not re-scraped
+_PRODUCT_CACHE = TTLCache(maxsize=512, ttl=600)
+# Scrapes in progress keyed on the cleaned URL, so concurrent requests share one
+_PENDING_SCRAPES = {}
+_PRODUCT_IMG_RE = re.compile(r'/p/|pzsku|product', re.IGNORECASE)
+_NEXT_DATA_RE = re.compile(r'<script id="__NEXT_DATA__"[^>]*>(.*?)</script>', re.DOTALL)
+
 # Get bot token from environment variable or .env file
 try:
     from dotenv import load_dotenv
@@ -24,126 +42,291 @@ TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 if not TOKEN:
     raise ValueError("No TELEGRAM_BOT_TOKEN found in environment variables")
 
-def start(update: Update, context: CallbackContext) -> None:
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+    'Accept-Language': 'en-US,en;q=0.9',
+    # aiohttp decodes Brotli responses when the brotli package is installed
+    'Accept-Encoding': 'br, gzip',
+}
+
+NAME_NOT_FOUND = "Product name not found"
+PRICE_NOT_FOUND = "Price not found"
+
+# Retry policy for the product page fetch
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.3
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRY_AFTER = 10
+
+# BadRequest messages meaning Telegram could not fetch an image URL itself
+URL_FETCH_ERRORS = (
+    'webpage_curl_failed',
+    'wrong type of the web page content',
+    'failed to get http url content',
+)
+
+# Telegram rejects uploaded photos above 10 MB
+MAX_IMAGE_SIZE = 10 * 1024 * 1024
+IMAGE_CHUNK_SIZE = 64 * 1024
+
+WARMUP_URLS = ('https://www.namshi.com/', 'https://a.namshicdn.com/')
+# Stay below typical server/CDN idle timeouts so pooled sockets are rarely stale
+KEEPALIVE_TIMEOUT = 55
+DNS_CACHE_TTL = 300
+
+# At most 2 products in flight per chat and 20 outbound Namshi requests overall
+CHAT_CONCURRENCY = 2
+# chat id -> [semaphore, number of handlers holding or waiting for it]
+CHAT_SEMAPHORES = {}
+GLOBAL_SEMAPHORE = asyncio.Semaphore(20)
+
+# Bounded pool for HTML parsing so CPU work never runs on the event loop
+PARSE_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Shared HTTP session so product pages and images reuse pooled connections.
+# It has to be created inside the running event loop, see post_init().
+SESSION: Optional[aiohttp.ClientSession] = None
+
+async def post_init(application: Application) -> None:
+    """Create the shared HTTP session once the event loop is running."""
+    global SESSION
+    SESSION = aiohttp.ClientSession(
+        headers=HEADERS,
+        # Keep warmed-up sockets and DNS entries around longer than aiohttp's 15s/10s defaults
+        connector=aiohttp.TCPConnector(
+            limit=32,
+            limit_per_host=16,
+            keepalive_timeout=KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=DNS_CACHE_TTL,
+        ),
+        timeout=aiohttp.ClientTimeout(total=10),
+    )
+    await warm_up_connections()
+
+async def warm_up_connections() -> None:
+    """Open pooled connections to Namshi so the first user request skips the handshakes."""
+    await asyncio.gather(*(warm_up_connection(url) for url in WARMUP_URLS))
+
+async def warm_up_connection(url: str) -> None:
+    """Open one pooled connection to the host of a URL."""
+    try:
+        async with SESSION.head(url, timeout=aiohttp.ClientTimeout(total=5)):
+            pass
+    except Exception as e:
+        logger.warning(f"Connection warmup for {url} failed: {e}")
+
+async def post_shutdown(application: Application) -> None:
+    """Close the shared HTTP session and the parsing pool."""
+    if SESSION is not None:
+        await SESSION.close()
+    PARSE_EXECUTOR.shutdown(wait=False)
+
+async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /start is issued."""
     user = update.effective_user
-    update.message.reply_text(
+    await update.message.reply_text(
         f'Hi {user.first_name}! Send me a Namshi product URL and I\'ll extract the product details for you.'
     )
 
-def help_command(update: Update, context: CallbackContext) -> None:
+async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Send a message when the command /help is issued."""
-    update.message.reply_text(
+    await update.message.reply_text(
         'Send me a Namshi product URL (e.g., https://www.namshi.com/uae-en/buy-product-name/product-id/p/) '
         'and I\'ll extract the product images, name, price, and available sizes for you.'
     )
 
 def is_namshi_url(url: str) -> bool:
     """Check if the URL is a valid Namshi product URL."""
-    return bool(re.match(r'https?://(?:www\.)?namshi\.com/.*?/p/', url))
+    return NAMSHI_URL_RE.match(url) is not None
 
-def extract_product_info(url: str) -> dict:
+def extract_next_data_product(html: str) -> Optional[dict]:
+    """Extract product information from the page's embedded __NEXT_DATA__ JSON."""
+    match = _NEXT_DATA_RE.search(html)
+    if not match:
+        return None
+    
+    try:
+        product = json.loads(match.group(1))['props']['pageProps']['product']
+    except (ValueError, KeyError, TypeError):
+        return None
+    if not isinstance(product, dict) or not product.get('title'):
+        return None
+    
+    price = product.get('price')
+    if isinstance(price, dict):
+        value = price.get('value')
+        currency = price.get('currency')
+        price = f"{currency} {value}" if currency and value is not None else value
+    
+    sizes = [
+        str(variant['size']) for variant in product.get('variants') or []
+        if isinstance(variant, dict) and variant.get('available') and variant.get('size')
+    ]
+    
+    image_urls = [
+        image['url'] for image in product.get('images') or []
+        if isinstance(image, dict) and image.get('url')
+    ]
+    
+    return {
+        'name': product['title'],
+        'price': str(price) if price is not None else None,
+        'sizes': sizes,
+        'image_urls': list(dict.fromkeys(image_urls))
+    }
+
+def iter_gallery_images(soup: BeautifulSoup):
+    """Yield image URLs from the product gallery."""
+    for img in soup.select('div.ImageGallery_imageContainer__jmn93 img'):
+        if 'src' in img.attrs and img['src'].startswith('http'):
+            image_url = img['src']
+            # Ensure we're getting the highest resolution by modifying the width parameter
+            yield _WIDTH_RE.sub(r'\g<1>800', image_url)
+
+def iter_meta_images(soup: BeautifulSoup):
+    """Yield product image URLs from the og:image meta tags."""
+    for img in soup.select('meta[property="og:image"]'):
+        if 'content' in img.attrs and img['content'].startswith('http') and 'namshi-logo' not in img['content'].lower():
+            # Filter out logo images and ensure it's a product image
+            if '/p/' in img['content'] or 'pzsku' in img['content']:
+                yield img['content']
+
+def iter_alt_images(soup: BeautifulSoup):
+    """Yield large product image URLs found by their alt text."""
+    # Look for images with specific product-related classes or attributes
+    for img in soup.select('img[alt*="PUMA"], img[alt*="product"], img[alt*="Product"]'):
+        if 'src' in img.attrs and img['src'].startswith('http'):
+            image_url = img['src']
+            # Filter out small images, icons, and logos
+            width = _WIDTH_RE.search(image_url)
+            if (width and int(width.group(2)) > 200) or '/p/' in image_url or 'pzsku' in image_url:
+                # Ensure we're getting the highest resolution
+                yield _WIDTH_RE.sub(r'\g<1>800', image_url)
+
+def extract_image_urls(soup: BeautifulSoup) -> list:
+    """Extract product image URLs from the first source that yields any."""
+    for source in (iter_gallery_images, iter_meta_images, iter_alt_images):
+        # Deduplicate and filter in one pass; a dict keeps every URL seen in order
+        seen = {}
+        image_urls = []
+        for url in source(soup):
+            if url in seen:
+                continue
+            seen[url] = None
+            # Include only URLs that are likely to be product images
+            if _PRODUCT_IMG_RE.search(url):
+                image_urls.append(url)
+        
+        if seen:
+            # If we filtered out all images, fall back to everything we saw
+            return image_urls or list(seen)
+    return []
+
+async def fetch_page(url: str) -> bytes:
+    """Fetch a page, retrying connection errors, rate limits and transient server errors."""
+    for attempt in range(RETRY_ATTEMPTS + 1):
+        delay = RETRY_BACKOFF * 2 ** attempt
+        try:
+            # Hold a global slot only while the request is in flight, not during backoff
+            async with GLOBAL_SEMAPHORE, SESSION.get(url) as response:
+                if response.status not in RETRY_STATUSES or attempt == RETRY_ATTEMPTS:
+                    response.raise_for_status()
+                    return await response.read()
+                logger.warning(f"Got HTTP {response.status} for {url}, retrying")
+                # Honour the server's Retry-After on rate limits, within reason
+                retry_after = response.headers.get('Retry-After', '')
+                if response.status == 429 and retry_after.isdigit():
+                    delay = min(int(retry_after), MAX_RETRY_AFTER)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            # Covers stale pooled sockets the server already closed
+            if attempt == RETRY_ATTEMPTS:
+                raise
+            logger.warning(f"Fetching {url} failed: {e!r}, retrying")
+        await asyncio.sleep(delay)
+
+async def scrape_product_info(clean_url: str) -> dict:
+    """Fetch a Namshi product page and extract the product information."""
+    content = await fetch_page(clean_url)
+    
+    # Parsing is CPU-bound, keep it off the event loop so other chats keep progressing
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(PARSE_EXECUTOR, parse_product_page, content)
+
+def parse_product_page(content: bytes) -> dict:
+    """Extract product information from the raw HTML of a Namshi product page."""
+    # Namshi serves UTF-8, decode once instead of letting the charset be sniffed
+    html = content.decode('utf-8', errors='replace')
+    
+    # Prefer the product object Next.js embeds in the page, it survives class renames
+    product_info = extract_next_data_product(html)
+    if product_info and product_info['price'] and product_info['image_urls']:
+        return product_info
+    
+    # Fall back to scraping the rendered HTML
+    soup = BeautifulSoup(html, 'lxml')
+    
+    # Extract product name
+    # First try to get it from the meta tags (more reliable)
+    meta_title = soup.select_one('meta[property="og:title"]')
+    if meta_title and 'content' in meta_title.attrs:
+        name = meta_title['content'].split('|')[0].strip()
+    else:
+        # Try to find it in the HTML structure
+        product_name = soup.select_one('h1.ProductConversion_productTitle__dvlc5')
+        if not product_name:
+            product_name = soup.select_one('h1[class*="productTitle"]')
+        name = product_name.get_text(strip=True) if product_name else NAME_NOT_FOUND
+    
+    # Extract product price
+    price_element = soup.select_one('span.ProductPrice_value__hnFSS')
+    if not price_element:
+        price_element = soup.select_one('span[class*="value"]')
+    price = price_element.get_text(strip=True) if price_element else PRICE_NOT_FOUND
+    
+    # Extract available sizes from the size buttons that are not disabled
+    sizes = [
+        size_element.get_text(strip=True)
+        for size_element in soup.select('button[class*="size_variant"]:not([disabled])')
+    ]
+    
+    # Extract product images
+    image_urls = extract_image_urls(soup)
+    
+    scraped_info = {
+        'name': name,
+        'price': price,
+        'sizes': sizes,
+        'image_urls': image_urls
+    }
+    if not product_info:
+        return scraped_info
+    
+    # The JSON did not match the expected schema everywhere, fill its gaps from the HTML
+    return {key: product_info[key] or value for key, value in scraped_info.items()}
+
+async def extract_product_info(url: str) -> dict:
     """Extract product information from a Namshi product URL."""
     # Clean the URL to remove tracking parameters
     clean_url = url.split('?')[0] if '?' in url else url
     
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'Accept-Language': 'en-US,en;q=0.9',
-    }
+    # Serve repeat requests for the same product from the cache
+    product_info = _PRODUCT_CACHE.get(clean_url)
+    if product_info is None:
+        # Join a scrape of the same product that is already running instead of starting another
+        pending = _PENDING_SCRAPES.get(clean_url)
+        if pending is None:
+            pending = _PENDING_SCRAPES[clean_url] = asyncio.ensure_future(load_product_info(clean_url))
+            pending.add_done_callback(lambda _: _PENDING_SCRAPES.pop(clean_url, None))
+        # Shield the shared scrape so one cancelled caller doesn't cancel it for the others
+        product_info = await asyncio.shield(pending)
     
+    # Hand out a copy so callers can never modify the cached entry
+    return copy.deepcopy(product_info)
+
+async def load_product_info(clean_url: str) -> dict:
+    """Scrape a product and cache the result if it is complete."""
     try:
-        response = requests.get(clean_url, headers=headers)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract product name
-        # First try to get it from the meta tags (more reliable)
-        meta_title = soup.select_one('meta[property="og:title"]')
-        if meta_title and 'content' in meta_title.attrs:
-            name = meta_title['content'].split('|')[0].strip()
-        else:
-            # Try to find it in the HTML structure
-            product_name = soup.select_one('h1.ProductConversion_productTitle__dvlc5')
-            if not product_name:
-                product_name = soup.select_one('h1[class*="productTitle"]')
-            name = product_name.text.strip() if product_name else "Product name not found"
-        
-        # Extract product price
-        price_element = soup.select_one('span.ProductPrice_value__hnFSS')
-        if not price_element:
-            price_element = soup.select_one('span[class*="value"]')
-        price = price_element.text.strip() if price_element else "Price not found"
-        
-        # Extract available sizes
-        sizes = []
-        # Look for size buttons that are not disabled
-        size_elements = soup.select('button.SizePills_size_variant__4qpXf:not([disabled])')
-        if not size_elements:
-            size_elements = soup.select('button[class*="size_variant"]:not([disabled])')
-        
-        for size_element in size_elements:
-            sizes.append(size_element.text.strip())
-        
-        # Extract product images
-        image_urls = []
-        
-        # First approach: Look for product gallery images
-        gallery_images = soup.select('div.ImageGallery_imageContainer__jmn93 img')
-        for img in gallery_images:
-            if 'src' in img.attrs and img['src'].startswith('http'):
-                image_url = img['src']
-                # Ensure we're getting the highest resolution
-                if 'width=' in image_url:
-                    # Try to get a higher resolution by modifying the width parameter
-                    image_url = image_url.split('width=')[0] + 'width=800'
-                image_urls.append(image_url)
-        
-        # Second approach: Try to get images from meta tags if gallery approach failed
-        if not image_urls:
-            meta_images = soup.select('meta[property="og:image"]')
-            for img in meta_images:
-                if 'content' in img.attrs and img['content'].startswith('http') and 'namshi-logo' not in img['content'].lower():
-                    # Filter out logo images and ensure it's a product image
-                    if '/p/' in img['content'] or 'pzsku' in img['content']:
-                        image_urls.append(img['content'])
-        
-        # Third approach: Look for product images in the HTML if other methods failed
-        if not image_urls:
-            # Look for images with specific product-related classes or attributes
-            image_elements = soup.select('img[alt*="PUMA"], img[alt*="product"], img[alt*="Product"]')
-            
-            for img in image_elements:
-                if 'src' in img.attrs and img['src'].startswith('http'):
-                    image_url = img['src']
-                    # Filter out small images, icons, and logos
-                    if ('width=' in image_url and int(image_url.split('width=')[1].split('&')[0]) > 200) or \
-                       ('/p/' in image_url or 'pzsku' in image_url):
-                        # Ensure we're getting the highest resolution
-                        if 'width=' in image_url:
-                            image_url = image_url.split('width=')[0] + 'width=800'
-                        image_urls.append(image_url)
-        
-        # Remove duplicates while preserving order
-        image_urls = list(dict.fromkeys(image_urls))
-        
-        # Additional filtering to remove non-product images
-        filtered_urls = []
-        for url in image_urls:
-            # Include only URLs that are likely to be product images
-            if any(pattern in url.lower() for pattern in ['/p/', 'pzsku', 'product', '/pzsku/']):
-                filtered_urls.append(url)
-        
-        # If we filtered out all images, revert to the original list
-        image_urls = filtered_urls if filtered_urls else image_urls
-        
-        return {
-            'name': name,
-            'price': price,
-            'sizes': sizes,
-            'image_urls': image_urls
-        }
+        product_info = await scrape_product_info(clean_url)
     except Exception as e:
         logger.error(f"Error extracting product info: {e}")
         return {
@@ -152,113 +335,157 @@ def extract_product_info(url: str) -> dict:
             'sizes': [],
             'image_urls': []
         }
+    
+    # Don't cache degraded results, e.g. a bot-challenge page with no product on it
+    if (product_info['image_urls'] and product_info['name'] != NAME_NOT_FOUND
+            and product_info['price'] != PRICE_NOT_FOUND):
+        _PRODUCT_CACHE[clean_url] = product_info
+    return product_info
 
-def download_image(url: str) -> bytes:
+async def download_image(url: str) -> bytes:
     """Download an image from a URL."""
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.content
+        async with GLOBAL_SEMAPHORE, SESSION.get(url, raise_for_status=True) as response:
+            # Skip images Telegram would reject before buffering them
+            if response.content_length is not None and response.content_length > MAX_IMAGE_SIZE:
+                raise ValueError(f"image larger than {MAX_IMAGE_SIZE} bytes")
+            # Stream the body so chunked or compressed responses are capped while reading
+            chunks = []
+            size = 0
+            async for chunk in response.content.iter_chunked(IMAGE_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_IMAGE_SIZE:
+                    raise ValueError(f"image larger than {MAX_IMAGE_SIZE} bytes")
+                chunks.append(chunk)
+            return b"".join(chunks)
     except Exception as e:
         logger.error(f"Error downloading image: {e}")
         return None
 
-def handle_message(update: Update, context: CallbackContext) -> None:
+async def call_with_flood_retry(method, *args, **kwargs):
+    """Call a Bot API method, waiting out Telegram's flood control once if asked to."""
+    try:
+        return await method(*args, **kwargs)
+    except RetryAfter as e:
+        logger.warning(f"Flood control exceeded, retrying in {e.retry_after} seconds")
+        await asyncio.sleep(e.retry_after)
+        return await method(*args, **kwargs)
+
+async def send_media_batch(context: ContextTypes.DEFAULT_TYPE, chat_id: int, batch: list) -> bool:
+    """Send one media group, uploading the images if Telegram can't fetch their URLs."""
+    try:
+        await call_with_flood_retry(context.bot.send_media_group, chat_id=chat_id, media=batch)
+        return True
+    except BadRequest as e:
+        if not any(marker in str(e).lower() for marker in URL_FETCH_ERRORS):
+            logger.error(f"Error sending images: {e}")
+            return False
+        # Telegram could not fetch the URLs itself, upload the bytes instead
+        logger.warning(f"Sending images by URL failed, uploading them instead: {e}")
+    
+    images = await asyncio.gather(*(download_image(photo.media) for photo in batch))
+    batch = [InputMediaPhoto(media=image_data) for image_data in images if image_data]
+    if not batch:
+        return False
+    
+    try:
+        await call_with_flood_retry(context.bot.send_media_group, chat_id=chat_id, media=batch)
+    except BadRequest as e:
+        logger.error(f"Error uploading images: {e}")
+        return False
+    return True
+
+@asynccontextmanager
+async def chat_slot(chat_id: int):
+    """Hold one of a chat's in-flight slots, dropping its semaphore once nobody uses it."""
+    entry = CHAT_SEMAPHORES.get(chat_id)
+    if entry is None:
+        entry = CHAT_SEMAPHORES[chat_id] = [asyncio.Semaphore(CHAT_CONCURRENCY), 0]
+    entry[1] += 1
+    try:
+        async with entry[0]:
+            yield
+    finally:
+        entry[1] -= 1
+        if not entry[1]:
+            del CHAT_SEMAPHORES[chat_id]
+
+async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Process the user message."""
     message_text = update.message.text
     
     # Check if the message contains a Namshi URL
     if is_namshi_url(message_text):
         # Inform user that processing has started
-        processing_msg = update.message.reply_text("Processing your Namshi product URL... Please wait.")
-        
-        # Extract product information
-        product_info = extract_product_info(message_text)
-        
-        # Prepare product details text
-        sizes_text = ", ".join(product_info['sizes']) if product_info['sizes'] else "No sizes available"
-        details_text = (
-            f"*{product_info['name']}*\n\n"
-            f"*Price:* {product_info['price']}\n\n"
-            f"*Available Sizes:* {sizes_text}"
+        processing_msg = await call_with_flood_retry(
+            update.message.reply_text, "Processing your Namshi product URL... Please wait."
         )
         
-        # Import necessary classes
-        from telegram import InputMediaPhoto
-        
-        # Send product images as a media group with caption
-        if product_info['image_urls']:
-            # Download all images first
-            media_group = []
-            for i, image_url in enumerate(product_info['image_urls']):
-                image_data = download_image(image_url)
-                if image_data:
-                    # Add caption to the first image only
-                    caption = details_text if i == 0 else ""
-                    parse_mode = ParseMode.MARKDOWN if i == 0 else None
-                    
-                    # Create InputMediaPhoto object
-                    media_photo = InputMediaPhoto(
-                        media=image_data,
-                        caption=caption,
-                        parse_mode=parse_mode
-                    )
-                    media_group.append(media_photo)
+        # Bound in-flight work per chat so one user can't flood Namshi or Telegram
+        async with chat_slot(update.effective_chat.id):
+            # Extract product information
+            product_info = await extract_product_info(message_text)
             
-            if media_group:
-                # Send media group (up to 10 images per group as per Telegram's limit)
-                if len(media_group) <= 10:
-                    context.bot.send_media_group(
-                        chat_id=update.effective_chat.id,
-                        media=media_group
-                    )
-                else:
-                    # If more than 10 images, send in batches
-                    for i in range(0, len(media_group), 10):
-                        batch = media_group[i:i+10]
-                        context.bot.send_media_group(
-                            chat_id=update.effective_chat.id,
-                            media=batch
-                        )
+            # Prepare product details text
+            sizes_text = ", ".join(product_info['sizes']) if product_info['sizes'] else "No sizes available"
+            details_text = (
+                f"*{product_info['name']}*\n\n"
+                f"*Price:* {product_info['price']}\n\n"
+                f"*Available Sizes:* {sizes_text}"
+            )
+            
+            # Turn the processing message into the product details
+            await call_with_flood_retry(processing_msg.edit_text, details_text, parse_mode=ParseMode.MARKDOWN)
+            
+            # Send product images as media groups
+            if product_info['image_urls']:
+                # Pass the image URLs straight to Telegram so its servers fetch them
+                media_group = [InputMediaPhoto(media=image_url) for image_url in product_info['image_urls']]
+                
+                # Send media groups (up to 10 images per group as per Telegram's limit) concurrently
+                results = await asyncio.gather(*(
+                    send_media_batch(context, update.effective_chat.id, media_group[i:i+10])
+                    for i in range(0, len(media_group), 10)
+                ), return_exceptions=True)
                 
-                update.message.reply_text("All product information has been sent!")
+                # Let every batch finish, a failed one must not abandon the others
+                for result in results:
+                    if isinstance(result, Exception):
+                        logger.error(f"Error sending image batch: {result}")
+                
+                if not any(result is True for result in results):
+                    # If no images could be sent
+                    await call_with_flood_retry(update.message.reply_text, "Failed to download product images.")
             else:
-                # If no images were successfully downloaded
-                update.message.reply_text(details_text, parse_mode=ParseMode.MARKDOWN)
-                update.message.reply_text("Failed to download product images.")
-        else:
-            # If no image URLs were found
-            update.message.reply_text(details_text, parse_mode=ParseMode.MARKDOWN)
-            update.message.reply_text("No product images found.")
-        
-        # Delete the processing message
-        context.bot.delete_message(
-            chat_id=processing_msg.chat_id,
-            message_id=processing_msg.message_id
-        )
+                # If no image URLs were found
+                await call_with_flood_retry(update.message.reply_text, "No product images found.")
     else:
-        update.message.reply_text(
+        await call_with_flood_retry(
+            update.message.reply_text,
             "Please send a valid Namshi product URL (e.g., https://www.namshi.com/uae-en/buy-product-name/product-id/p/)"
         )
 
 def main() -> None:
     """Start the bot."""
-    # Create the Updater and pass it your bot's token
-    updater = Updater(TOKEN, use_context=True)
-
-    # Get the dispatcher to register handlers
-    dispatcher = updater.dispatcher
+    # Create the Application and pass it your bot's token
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(True)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     # Register command handlers
-    dispatcher.add_handler(CommandHandler("start", start))
-    dispatcher.add_handler(CommandHandler("help", help_command))
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("help", help_command))
 
     # Register message handler
-    dispatcher.add_handler(MessageHandler(Filters.text & ~Filters.command, handle_message))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
 
     # Start the Bot with a longer timeout
-    updater.start_polling(timeout=30, drop_pending_updates=True)
-    updater.idle()
+    application.run_polling(timeout=30, drop_pending_updates=True)
 
 if __name__ == '__main__':
     main()